@@ -1,8 +1,21 @@
 # ai/generator.py
 # Minimal "text -> mesh" generator: picks a primitive and writes mesh.obj
-import os, time, math
+import os, re, time
+import numpy as np
 from dataclasses import dataclass
 
+# prompt keywords per shape, in priority order (anything else -> cube)
+_SHAPE_KEYWORDS = (
+    ("torus",    ("donut", "torus", "bagel", "ring")),
+    ("sphere",   ("sphere", "ball", "planet", "head")),
+    ("cone",     ("cone", "ice cream", "pyramid-ish")),
+    ("cylinder", ("cylinder", "tube", "can")),
+)
+_KEYWORDS = {kw: shape for shape, kws in _SHAPE_KEYWORDS for kw in kws}
+_SHAPE_RANK = {shape: i for i, (shape, _) in enumerate(_SHAPE_KEYWORDS)}
+# lookahead so overlapping keywords are all reported (substring match, like `k in p`)
+_KEYWORD_RE = re.compile("(?=(%s))" % "|".join(map(re.escape, _KEYWORDS)))
+
 @dataclass
 class GenResult:
     ok: bool
@@ -27,14 +40,11 @@ class GeneratorEngine:
 
     # --------- shape selection ----------
     def _decide_shape(self, prompt: str) -> str:
-        p = prompt.lower()
-        if any(k in p for k in ("donut", "torus", "bagel", "ring")):       return "torus"
-        if any(k in p for k in ("sphere", "ball", "planet", "head")):       return "sphere"
-        if any(k in p for k in ("cone", "ice cream", "pyramid-ish")):       return "cone"
-        if any(k in p for k in ("cylinder", "tube", "can")):                return "cylinder"
-        return "cube"
+        # one scan for every keyword; when several shapes match, table order wins
+        hits = {_KEYWORDS[m] for m in _KEYWORD_RE.findall(prompt.lower())}
+        return min(hits, key=_SHAPE_RANK.__getitem__) if hits else "cube"
 
-    # --------- primitive builders (return triangles) ----------
+    # --------- primitive builders (return (N,3) float64 verts, (M,3) int32 faces) ----------
     def _make_shape(self, name: str):
         if name == "sphere":   return self._uv_sphere(0.6, 32, 16)
         if name == "torus":    return self._torus(0.65, 0.22, 40, 24)
@@ -44,88 +54,90 @@ class GeneratorEngine:
 
     def _cube(self, size=1.0):
         s = size * 0.5
-        v = [(-s,-s,-s),( s,-s,-s),( s, s,-s),(-s, s,-s),
-             (-s,-s, s),( s,-s, s),( s, s, s),(-s, s, s)]
-        f = [(0,1,2),(0,2,3),(4,5,6),(4,6,7),
-             (0,1,5),(0,5,4),(2,3,7),(2,7,6),
-             (1,2,6),(1,6,5),(0,3,7),(0,7,4)]
+        v = np.array([(-s,-s,-s),( s,-s,-s),( s, s,-s),(-s, s,-s),
+                      (-s,-s, s),( s,-s, s),( s, s, s),(-s, s, s)], dtype=np.float64)
+        f = np.array([(0,1,2),(0,2,3),(4,5,6),(4,6,7),
+                      (0,1,5),(0,5,4),(2,3,7),(2,7,6),
+                      (1,2,6),(1,6,5),(0,3,7),(0,7,4)], dtype=np.int32)
         return v, f
 
     def _uv_sphere(self, radius=0.5, seg=32, rings=16):
-        verts = []; faces = []
-        def idx(i,j): return i*seg + (j % seg)
-        for i in range(rings+1):
-            theta = math.pi * i / rings
-            y = radius * math.cos(theta)
-            r = radius * math.sin(theta)
-            for j in range(seg):
-                phi = 2*math.pi * j / seg
-                x = r * math.cos(phi); z = r * math.sin(phi)
-                verts.append((x, y, z))
-        for i in range(rings):
-            for j in range(seg):
-                a = idx(i, j); b = idx(i+1, j); c = idx(i+1, j+1); d = idx(i, j+1)
-                if i == 0:          faces.append((a, b, c))
-                elif i == rings-1:  faces.append((a, b, d))
-                else:               faces.append((a, b, c)); faces.append((a, c, d))
-        return verts, faces
+        theta = np.linspace(0.0, np.pi, rings+1)
+        phi = np.linspace(0.0, 2*np.pi, seg, endpoint=False)
+        r = radius * np.sin(theta)[:, None]
+        x = r * np.cos(phi)[None, :]
+        y = np.broadcast_to((radius * np.cos(theta))[:, None], x.shape)
+        z = r * np.sin(phi)[None, :]
+        verts = np.stack([x, y, z], axis=-1).reshape(-1, 3)
+
+        idx = np.arange((rings+1)*seg, dtype=np.int32).reshape(rings+1, seg)
+        a = idx[:-1]; b = idx[1:]
+        c = np.roll(b, -1, axis=1); d = np.roll(a, -1, axis=1)
+        # per ring: two tris (a,b,c),(a,c,d); the pole rings collapse to one
+        quads = np.stack([np.stack([a, b, c], -1), np.stack([a, c, d], -1)], axis=2)  # (rings,seg,2,3)
+        faces = [np.stack([a[0], b[0], c[0]], -1)]
+        if rings > 2:
+            faces.append(quads[1:-1].reshape(-1, 3))
+        if rings > 1:
+            faces.append(np.stack([a[-1], b[-1], d[-1]], -1))
+        return verts, np.concatenate(faces).astype(np.int32)
 
     def _cone(self, radius=0.5, height=1.0, seg=32):
-        verts = []; faces = []
-        for j in range(seg):
-            phi = 2*math.pi*j/seg
-            x = radius*math.cos(phi); z = radius*math.sin(phi)
-            verts.append((x, -height/2, z))
-        apex_i = len(verts);  verts.append((0.0,  height/2, 0.0))
-        center_i = len(verts); verts.append((0.0, -height/2, 0.0))
-        for j in range(seg):
-            a = j; b = (j+1)%seg
-            faces.append((a, b, apex_i))      # side
-            faces.append((center_i, b, a))    # base
+        phi = np.linspace(0.0, 2*np.pi, seg, endpoint=False)
+        verts = np.empty((seg+2, 3), dtype=np.float64)
+        verts[:seg, 0] = radius*np.cos(phi)
+        verts[:seg, 1] = -height/2
+        verts[:seg, 2] = radius*np.sin(phi)
+        apex_i = seg;      verts[apex_i] = (0.0,  height/2, 0.0)
+        center_i = seg+1;  verts[center_i] = (0.0, -height/2, 0.0)
+        a = np.arange(seg, dtype=np.int32); b = np.roll(a, -1)
+        apex = np.full(seg, apex_i, dtype=np.int32); center = np.full(seg, center_i, dtype=np.int32)
+        side = np.stack([a, b, apex], -1)
+        base = np.stack([center, b, a], -1)
+        faces = np.stack([side, base], axis=1).reshape(-1, 3)
         return verts, faces
 
     def _cylinder(self, radius=0.5, height=1.0, seg=32):
-        verts = []; faces = []
-        top=[]; bot=[]
-        for j in range(seg):
-            phi = 2*math.pi*j/seg
-            x = radius*math.cos(phi); z = radius*math.sin(phi)
-            top.append(len(verts)); verts.append((x,  height/2, z))
-            bot.append(len(verts)); verts.append((x, -height/2, z))
-        top_c = len(verts); verts.append((0.0,  height/2, 0.0))
-        bot_c = len(verts); verts.append((0.0, -height/2, 0.0))
-        for j in range(seg):
-            a = bot[j]; b = bot[(j+1)%seg]; c = top[(j+1)%seg]; d = top[j]
-            faces.append((a, b, c)); faces.append((a, c, d))  # side
-            faces.append((top_c, d, c))                        # top
-            faces.append((bot_c, b, a))                        # bottom
+        phi = np.linspace(0.0, 2*np.pi, seg, endpoint=False)
+        x = radius*np.cos(phi); z = radius*np.sin(phi)
+        verts = np.empty((2*seg+2, 3), dtype=np.float64)
+        verts[0:2*seg:2] = np.stack([x, np.full(seg,  height/2), z], -1)   # top ring
+        verts[1:2*seg:2] = np.stack([x, np.full(seg, -height/2), z], -1)   # bottom ring
+        top_c = 2*seg;   verts[top_c] = (0.0,  height/2, 0.0)
+        bot_c = 2*seg+1; verts[bot_c] = (0.0, -height/2, 0.0)
+        top = np.arange(0, 2*seg, 2, dtype=np.int32); bot = top + 1
+        a = bot; b = np.roll(bot, -1); c = np.roll(top, -1); d = top
+        tc = np.full(seg, top_c, dtype=np.int32); bc = np.full(seg, bot_c, dtype=np.int32)
+        faces = np.stack([np.stack([a, b, c], -1), np.stack([a, c, d], -1),   # side
+                          np.stack([tc, d, c], -1),                            # top
+                          np.stack([bc, b, a], -1)], axis=1).reshape(-1, 3)   # bottom
         return verts, faces
 
     def _torus(self, R=0.6, r=0.25, seg=32, ring=16):
-        verts = []; faces = []
-        for i in range(ring):
-            u = 2*math.pi*i/ring; cu, su = math.cos(u), math.sin(u)
-            for j in range(seg):
-                v = 2*math.pi*j/seg; cv, sv = math.cos(v), math.sin(v)
-                x = (R + r*cv) * cu
-                y =  r * sv
-                z = (R + r*cv) * su
-                verts.append((x, y, z))
-        def idx(i,j): return (i%ring)*seg + (j%seg)
-        for i in range(ring):
-            for j in range(seg):
-                a=idx(i,j); b=idx(i+1,j); c=idx(i+1,j+1); d=idx(i,j+1)
-                faces.append((a,b,c)); faces.append((a,c,d))
+        u = np.linspace(0.0, 2*np.pi, ring, endpoint=False)
+        v = np.linspace(0.0, 2*np.pi, seg, endpoint=False)
+        cu, su = np.cos(u)[:, None], np.sin(u)[:, None]
+        cv, sv = np.cos(v)[None, :], np.sin(v)[None, :]
+        x = (R + r*cv) * cu
+        y = np.broadcast_to(r * sv, x.shape)
+        z = (R + r*cv) * su
+        verts = np.stack([x, y, z], axis=-1).reshape(-1, 3)
+
+        idx = np.arange(ring*seg, dtype=np.int32).reshape(ring, seg)
+        a = idx; b = np.roll(idx, -1, axis=0)
+        c = np.roll(b, -1, axis=1); d = np.roll(a, -1, axis=1)
+        faces = np.stack([np.stack([a, b, c], -1), np.stack([a, c, d], -1)], axis=2).reshape(-1, 3)
         return verts, faces
 
     # --------- OBJ writer ----------
     def _write_obj(self, path: str, verts, faces):
-        with open(path, "w", encoding="utf-8") as f:
-            f.write("o generated\n")
-            for x,y,z in verts:
-                f.write(f"v {x:.6f} {y:.6f} {z:.6f}\n")
-            for a,b,c in faces:
-                f.write(f"f {a+1} {b+1} {c+1}\n")  # OBJ is 1-based
+        # bulk-format whole arrays instead of one f-string + write per row
+        verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3) + 1  # OBJ is 1-based
+        with open(path, "wb") as f:
+            f.write(b"o generated\n")
+            np.savetxt(f, verts, fmt="v %.6f %.6f %.6f", encoding="utf-8")
+            np.savetxt(f, faces, fmt="f %d %d %d", encoding="utf-8")
 
 if __name__ == "__main__":
     eng = GeneratorEngine(out_dir=os.path.join(os.path.dirname(__file__), "..", "outputs"))
@@ -1,2 +1,2 @@
 # renderer/__init__.py
-from .renderer import SimpleGLViewport
+from .renderer import SimpleGLViewport, surface_format
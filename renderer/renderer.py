@@ -3,31 +3,42 @@
 # - OBJ loader (triangulates n-gons)
 # - Grid floor like Blender
 # - Free-fly camera (WASD + mouse look)
-# - Basic OpenGL fixed-function lighting
+# - OpenGL 3.3 core profile: VAOs + small shaders, Blinn-Phong lit mesh
 # - reset_view() and load_new_obj() for ui.py
 
 from __future__ import annotations
-import math, os, time
-from typing import List, Tuple
+import ctypes, math, os, re, zipfile
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
 
 from PySide6.QtOpenGLWidgets import QOpenGLWidget
-from PySide6.QtCore import Qt, QPoint, QTimer
+from PySide6.QtCore import Qt, QPoint, QElapsedTimer
+from PySide6.QtGui import QSurfaceFormat
+from PySide6.QtWidgets import QApplication
+
+# PyOpenGL checks glGetError and logs around every call by default; these flags
+# must be set before the first OpenGL.GL import to drop that per-call overhead
+import OpenGL
+OpenGL.ERROR_CHECKING = False
+OpenGL.ERROR_LOGGING = False
+OpenGL.STORE_POINTERS = False   # pointers only ever reference bound VBO offsets
 from OpenGL.GL import *
-from OpenGL.GLU import gluPerspective, gluLookAt
 
+# optional: Numba compiles the mesh kernels below; without it they fall back to NumPy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+@lru_cache(maxsize=64)
 def _hex_to_rgbf(h: str) -> Tuple[float, float, float]:
     h = h.strip().lstrip("#")
     if len(h) == 3:
-        h = "".join([c * 2 for c in h])
-    r = int(h[0:2], 16) / 255.0
-    g = int(h[2:4], 16) / 255.0
-    b = int(h[4:6], 16) / 255.0
-    return r, g, b
-
-def _normalize(v):
-    x, y, z = v
-    l = math.sqrt(x*x + y*y + z*z) or 1.0
-    return (x/l, y/l, z/l)
+        h = h[0]*2 + h[1]*2 + h[2]*2
+    n = int(h, 16)
+    return ((n >> 16) & 0xFF) / 255.0, ((n >> 8) & 0xFF) / 255.0, (n & 0xFF) / 255.0
 
 def _cross(a, b):
     ax, ay, az = a; bx, by, bz = b
@@ -42,35 +53,245 @@ def _add(a,b):
 def _mul(v, s: float):
     return (v[0]*s, v[1]*s, v[2]*s)
 
+# held keys are tracked as bits in one int; movement keys -> (basis axis, sign)
+# with axis 0 = fwd, 1 = right, 2 = up
+_MOVE_TABLE = (
+    (Qt.Key_W, 0,  1), (Qt.Key_S, 0, -1),
+    (Qt.Key_D, 1,  1), (Qt.Key_A, 1, -1),
+    (Qt.Key_E, 2,  1), (Qt.Key_Q, 2, -1),
+)
+_KEYBIT = {key: 1 << i for i, (key, _, _) in enumerate(_MOVE_TABLE)}
+_MOVE_MASK = (1 << len(_MOVE_TABLE)) - 1
+
+def _move_coeffs(mask: int) -> Tuple[int, int, int]:
+    c = [0, 0, 0]
+    for i, (_, axis, sign) in enumerate(_MOVE_TABLE):
+        if mask >> i & 1:
+            c[axis] += sign
+    return tuple(c)
+
+# (fwd, right, up) coefficients for every combination of held movement keys
+_MOVE_DIRS = tuple(_move_coeffs(m) for m in range(_MOVE_MASK + 1))
+
+# OBJ statements, matched over the whole file at once
+_OBJ_V_RE = re.compile(rb"^[ \t]*v[ \t]+(\S+)[ \t]+(\S+)[ \t]+(\S+)", re.M)
+_OBJ_F_RE = re.compile(rb"^[ \t]*f[ \t]+([^\r\n]*)", re.M)
+_OBJ_REF_TAIL_RE = re.compile(rb"/\S*")   # face refs "v", "v/t", "v//n", "v/t/n" -> "v"
+# part of the .cache.npz key; bump whenever parsing/triangulation output changes
+_OBJ_CACHE_VERSION = 2
+
+# ------------- mesh kernels -------------
+# _triangulate_fans(offsets, idxs) -> int32 (T,3): face k is idxs[offsets[k]:offsets[k+1]],
+#   fan-triangulated as (idxs[0], idxs[i], idxs[i+1]).
+# _vertex_normals(verts, faces) -> float32 (N,3): sum of unit face normals per vertex, normalized.
+if njit is not None:
+    @njit(cache=True)
+    def _triangulate_fans(offsets, idxs):
+        n_tri = 0
+        for k in range(len(offsets) - 1):
+            n = offsets[k+1] - offsets[k]
+            if n >= 3:
+                n_tri += n - 2
+        out = np.empty((n_tri, 3), dtype=np.int32)
+        t = 0
+        for k in range(len(offsets) - 1):
+            s = offsets[k]
+            for i in range(s + 1, offsets[k+1] - 1):
+                out[t, 0] = idxs[s]; out[t, 1] = idxs[i]; out[t, 2] = idxs[i+1]
+                t += 1
+        return out
+
+    @njit(cache=True)
+    def _vertex_normals(verts, faces):
+        acc = np.zeros(verts.shape, dtype=np.float32)
+        for f in range(faces.shape[0]):
+            a = faces[f, 0]; b = faces[f, 1]; c = faces[f, 2]
+            ux = verts[b, 0] - verts[a, 0]; uy = verts[b, 1] - verts[a, 1]; uz = verts[b, 2] - verts[a, 2]
+            vx = verts[c, 0] - verts[a, 0]; vy = verts[c, 1] - verts[a, 1]; vz = verts[c, 2] - verts[a, 2]
+            nx = uy*vz - uz*vy; ny = uz*vx - ux*vz; nz = ux*vy - uy*vx
+            l = math.sqrt(nx*nx + ny*ny + nz*nz)
+            if l > 1e-12:
+                nx /= l; ny /= l; nz /= l
+            for v in (a, b, c):
+                acc[v, 0] += nx; acc[v, 1] += ny; acc[v, 2] += nz
+        for v in range(acc.shape[0]):
+            l = math.sqrt(acc[v, 0]**2 + acc[v, 1]**2 + acc[v, 2]**2)
+            if l > 0.0:
+                acc[v, 0] /= l; acc[v, 1] /= l; acc[v, 2] /= l
+        return acc
+else:
+    def _triangulate_fans(offsets, idxs):
+        sizes = np.diff(offsets)
+        n_tri = np.maximum(sizes - 2, 0)
+        face = np.repeat(np.arange(len(sizes)), n_tri)
+        first = offsets[:-1][face]
+        # i-th triangle of a face uses corners 0, i+1, i+2
+        i = np.arange(len(face)) - np.repeat(np.cumsum(n_tri) - n_tri, n_tri)
+        return np.stack([idxs[first], idxs[first + i + 1], idxs[first + i + 2]], axis=-1).astype(np.int32)
+
+    def _vertex_normals(verts, faces):
+        # face normals computed once, then scattered to their three corners
+        tri = verts[faces]                                          # (F,3,3)
+        fn = np.cross(tri[:,1] - tri[:,0], tri[:,2] - tri[:,0])
+        fn /= np.maximum(np.linalg.norm(fn, axis=1, keepdims=True), 1e-12)
+        acc = np.zeros_like(verts)
+        for k in range(3):
+            np.add.at(acc, faces[:,k], fn)
+        lens = np.linalg.norm(acc, axis=1, keepdims=True)
+        acc /= np.where(lens > 0, lens, 1.0)
+        return acc
+
+# ------------- shaders -------------
+# mesh: lit like the old fixed-function GL_LIGHT0 (eye-space point light at 5,8,5,
+# global + light ambient, 0.95 diffuse, 0.65*0.25 specular, shininess 32)
+# positions arrive as raw int16 in [-32767,32767] around the mesh bbox center (not normalized);
+# uPosScale = half-extent / 32767 and uPosOffset = center map them back to world space
+_MESH_VS = """#version 330 core
+layout(location = 0) in vec3 aPos;
+layout(location = 1) in vec3 aNormal;
+uniform mat4 uMVP;
+uniform mat4 uView;
+uniform vec3 uPosScale;
+uniform vec3 uPosOffset;
+out vec3 vPos;
+out vec3 vNormal;
+void main() {
+    vec4 p = vec4(aPos * uPosScale + uPosOffset, 1.0);
+    vPos = (uView * p).xyz;
+    vNormal = mat3(uView) * aNormal;   // view is rigid, no inverse-transpose needed
+    gl_Position = uMVP * p;
+}
+"""
+_MESH_FS = """#version 330 core
+in vec3 vPos;
+in vec3 vNormal;
+uniform vec3 uColor;
+out vec4 fragColor;
+const vec3 LIGHT_POS = vec3(5.0, 8.0, 5.0);
+void main() {
+    vec3 n = normalize(vNormal);
+    vec3 l = normalize(LIGHT_POS - vPos);
+    float diff = max(dot(n, l), 0.0);
+    float spec = diff > 0.0 ? pow(max(dot(n, normalize(l + vec3(0.0, 0.0, 1.0))), 0.0), 32.0) : 0.0;
+    vec3 c = uColor * (vec3(0.35, 0.35, 0.38) + 0.95 * diff) + vec3(0.1625) * spec;
+    fragColor = vec4(c, 1.0);
+}
+"""
+# grid: unlit lines with per-vertex color
+_LINE_VS = """#version 330 core
+layout(location = 0) in vec3 aPos;
+layout(location = 1) in vec3 aColor;
+uniform mat4 uMVP;
+out vec3 vColor;
+void main() {
+    vColor = aColor;
+    gl_Position = uMVP * vec4(aPos, 1.0);
+}
+"""
+_LINE_FS = """#version 330 core
+in vec3 vColor;
+out vec4 fragColor;
+void main() { fragColor = vec4(vColor, 1.0); }
+"""
+
+# mesh VBO record: int16 xyz (+ pad) position, float32 normal -> 20 bytes
+_MESH_VERTEX = np.dtype([("pos", np.int16, 4), ("nrm", np.float32, 3)])
+
+def _build_program(vs_src: str, fs_src: str) -> int:
+    prog = glCreateProgram()
+    shaders = []
+    for kind, src in ((GL_VERTEX_SHADER, vs_src), (GL_FRAGMENT_SHADER, fs_src)):
+        sh = glCreateShader(kind)
+        glShaderSource(sh, src)
+        glCompileShader(sh)
+        if not glGetShaderiv(sh, GL_COMPILE_STATUS):
+            raise RuntimeError(f"shader compile failed: {glGetShaderInfoLog(sh)}")
+        glAttachShader(prog, sh)
+        shaders.append(sh)
+    glLinkProgram(prog)
+    if not glGetProgramiv(prog, GL_LINK_STATUS):
+        raise RuntimeError(f"shader link failed: {glGetProgramInfoLog(prog)}")
+    for sh in shaders:
+        glDetachShader(prog, sh); glDeleteShader(sh)
+    return prog
+
+def _bind_interleaved_attribs(stride: int):
+    # attrib 0 = vec3 at offset 0, attrib 1 = vec3 at offset 12 of the bound VBO
+    glEnableVertexAttribArray(0)
+    glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+    glEnableVertexAttribArray(1)
+    glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(12))
+
+def surface_format() -> QSurfaceFormat:
+    # 3.3 core + depth + vsync; apps should also pass this to
+    # QSurfaceFormat.setDefaultFormat before creating QApplication (needed on macOS)
+    fmt = QSurfaceFormat()
+    fmt.setVersion(3, 3)
+    fmt.setProfile(QSurfaceFormat.CoreProfile)
+    fmt.setDepthBufferSize(24)
+    fmt.setSwapInterval(1)   # vsync; frames are paced by frameSwapped
+    return fmt
+
 class SimpleGLViewport(QOpenGLWidget):
     def __init__(self, parent=None, bg_hex="#1b1b1f", line_hex="#E6E6EA", obj_path=None):
         super().__init__(parent)
+        self.setFormat(surface_format())
+
         self._bg = _hex_to_rgbf(bg_hex)
-        self._line = _hex_to_rgbf(line_hex)
+        self._mesh_color = np.array(_hex_to_rgbf(line_hex), dtype=np.float32)
 
         # mesh
-        self._verts: List[Tuple[float,float,float]] = []
-        self._faces: List[Tuple[int,int,int]] = []
-        self._vnorms: List[Tuple[float,float,float]] = []  # per-vertex normals
+        self._verts = np.zeros((0, 3), dtype=np.float32)   # (N,3) positions
+        self._faces = np.zeros((0, 3), dtype=np.int32)     # (M,3) triangle indices
+        self._vnorms = np.zeros((0, 3), dtype=np.float32)  # (N,3) per-vertex normals
         self._bbox = None     # (minx,miny,minz,maxx,maxy,maxz)
         self._center = (0.0, 0.0, 0.0)
         self._grid_enabled = True
+        self._grid_half = 20      # lines each side of the camera
+        self._grid_step = 1.0     # finest spacing; coarsens x10 per decade of camera height
+        self._grid_vbo = None     # rebuilt when spacing or the camera's grid cell change
+        self._grid_vao = None
+        self._grid_n = 0
+        self._grid_key = None
+
+        # GPU buffers (interleaved pos+normal VBO, uint32 IBO, VAO); (re)uploaded lazily
+        # from paintGL because _load_obj may run before a GL context exists
+        self._vbo = None
+        self._ibo = None
+        self._vao = None
+        self._n_indices = 0
+        self._mesh_dirty = False
+        self._verts_dirty = False   # same topology, new positions -> _upload_verts
 
         # camera (free-fly)
         self._yaw = 35.0
         self._pitch = -20.0
+        self._basis_cache = None  # (fwd, right, up); reset whenever yaw/pitch change
+        self._fov, self._near, self._far = 45.0, 0.05, 500.0
+        self._proj_mat = None     # column-major perspective for _proj_key = (w, h, fov)
+        self._proj_key = None
+        self._view_mat = np.identity(4, dtype=np.float32)  # column-major, refilled in place
+        self._view_pos = None     # cam_pos / basis the view matrix was built from
+        self._view_basis = None
+        self._mvp = np.identity(4, dtype=np.float32)
+        self._mvp_stale = True    # set when the view or projection matrix is rebuilt
+        self._mvp_bytes = self._view_bytes = self._mvp.tobytes()
+        self._mvp_gen = 0         # bumped per new MVP; programs skip re-uploading a seen one
+        self._prog_gen = {}       # program -> _mvp_gen its camera uniforms hold
         self._dist = 3.5         # framing distance used by reset
         self._cam_pos = (0.0, 0.75, 3.5)  # starting pos slightly above ground
         self._move_speed = 1.5
-        self._keys = set()
+        self._keymask = 0        # bits from _KEYBIT for held keys
 
         # mouse
         self._last_mouse = QPoint()
         self._dragging_look = False
 
-        # timer for continuous movement
-        self._last_t = time.perf_counter()
-        self._timer = QTimer(self); self._timer.timeout.connect(self._tick); self._timer.start(16)
+        # continuous movement runs off frameSwapped: each swap integrates held keys
+        # and schedules another frame only while something is still changing
+        self._dirty = True
+        self._dt_timer = QElapsedTimer(); self._dt_timer.start()
+        self.frameSwapped.connect(self._on_swapped)
 
         self.setFocusPolicy(Qt.StrongFocus)  # capture WASD
 
@@ -86,6 +307,7 @@ class SimpleGLViewport(QOpenGLWidget):
         else:
             # default
             self._yaw, self._pitch = 35.0, -20.0
+            self._basis_cache = None
             self._cam_pos = (0.0, 0.75, 3.5)
             self._dist = 3.5
         self.update()
@@ -96,75 +318,95 @@ class SimpleGLViewport(QOpenGLWidget):
             self._frame_to_fit()
             self.update()
 
+    # replace vertex positions in place (same count/topology, e.g. a sculpt edit)
+    def set_vertices(self, verts):
+        verts = np.ascontiguousarray(verts, dtype=np.float32).reshape(-1, 3)
+        if len(verts) != len(self._verts):
+            raise ValueError(f"expected {len(self._verts)} vertices, got {len(verts)}")
+        self._verts = verts
+        self._compute_bounds()
+        self._compute_vertex_normals()
+        self._verts_dirty = True
+        self.update()
+
     # ------------- GL lifecycle -------------
     def initializeGL(self):
         r,g,b = self._bg
         glClearColor(r, g, b, 1.0)
         glEnable(GL_DEPTH_TEST)
 
-        # lighting
-        glEnable(GL_LIGHTING)
-        glEnable(GL_LIGHT0)
-        glLightfv(GL_LIGHT0, GL_POSITION, (5.0, 8.0, 5.0, 1.0))     # pos
-        glLightfv(GL_LIGHT0, GL_DIFFUSE,  (0.95, 0.95, 0.95, 1.0))
-        glLightfv(GL_LIGHT0, GL_SPECULAR, (0.65, 0.65, 0.65, 1.0))
-        glLightfv(GL_LIGHT0, GL_AMBIENT,  (0.15, 0.15, 0.18, 1.0))
-
-        glEnable(GL_COLOR_MATERIAL)
-        glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
-        glMaterialfv(GL_FRONT_AND_BACK, GL_SPECULAR, (0.25, 0.25, 0.25, 1.0))
-        glMaterialf(GL_FRONT_AND_BACK, GL_SHININESS, 32.0)
-        glShadeModel(GL_SMOOTH)
+        # Qt recreates the context when the widget changes top-level window; ids from
+        # the old one are already gone with it, so forget them without deleting
+        self._vbo = self._ibo = self._vao = None
+        self._n_indices = 0
+        self._grid_vbo = self._grid_vao = None
+        self._grid_key = None
+        # rebuild the mesh buffers on the next paint; that upload also re-sends the
+        # int16 dequantization uniforms the fresh mesh program would otherwise hold as 0
+        self._mesh_dirty = bool(len(self._faces))
+        self._prog_gen = {}   # (re)initialized context: new programs hold no camera yet
+        self._mesh_prog = _build_program(_MESH_VS, _MESH_FS)
+        self._mesh_u = {n: glGetUniformLocation(self._mesh_prog, n)
+                        for n in ("uMVP", "uView", "uColor", "uPosScale", "uPosOffset")}
+        # color is program state: set once here, never per frame
+        glUseProgram(self._mesh_prog)
+        glUniform3fv(self._mesh_u["uColor"], 1, self._mesh_color)
+        glUseProgram(0)
+        self._line_prog = _build_program(_LINE_VS, _LINE_FS)
+        self._line_u_mvp = glGetUniformLocation(self._line_prog, "uMVP")
 
     def resizeGL(self, w, h):
+        # QOpenGLWidget sets the viewport itself before every paintGL
         if h == 0: h = 1
-        glViewport(0, 0, w, h)
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        gluPerspective(45.0, w/float(h), 0.05, 500.0)
-        glMatrixMode(GL_MODELVIEW)
+        self._projection_matrix(w, h)
 
     def paintGL(self):
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
-        # camera
-        glMatrixMode(GL_MODELVIEW)
-        glLoadIdentity()
-        fwd, right, up = self._basis()
-        target = _add(self._cam_pos, fwd)
-        gluLookAt(self._cam_pos[0], self._cam_pos[1], self._cam_pos[2],
-                  target[0],        target[1],        target[2],
-                  up[0],            up[1],            up[2])
+        self._update_mvp()
 
         # draw grid (unlit lines)
         if self._grid_enabled:
-            glDisable(GL_LIGHTING)
             self._draw_grid()
-            glEnable(GL_LIGHTING)
 
         # draw mesh (lit)
         self._draw_mesh()
+        glBindVertexArray(0)
+        glUseProgram(0)
+        self._dirty = False
 
     # ------------- per-frame update -------------
-    def _tick(self):
-        now = time.perf_counter()
-        dt = max(0.0, min(0.05, now - self._last_t))
-        self._last_t = now
+    def _on_swapped(self):
+        dt = min(0.05, self._dt_timer.restart() / 1000.0)
         self._update_movement(dt)
-        self.update()
+        # idle viewport: no repaint unless something changed since the last frame
+        if self._dirty:
+            self.update()
 
     # ------------- input -------------
+    def _set_keymask(self, mask: int):
+        # opposing keys cancel out, so the frame loop idles whenever the held keys
+        # give no direction; restart it (timing dt from now) once they give one again
+        if any(_MOVE_DIRS[mask]) and not any(_MOVE_DIRS[self._keymask]):
+            self._dt_timer.restart()
+            self.update()
+        self._keymask = mask
+
     def keyPressEvent(self, e):
-        self._keys.add(e.key())
+        # auto-repeat arrives as release/press pairs (X11, Windows); the key never
+        # left the mask, so only real presses and releases touch it
+        if not e.isAutoRepeat():
+            self._set_keymask(self._keymask | _KEYBIT.get(e.key(), 0))
         if e.key() == Qt.Key_R:
             self.reset_view()
         elif e.key() == Qt.Key_G:
             self._grid_enabled = not self._grid_enabled
+            self.update()
         super().keyPressEvent(e)
 
     def keyReleaseEvent(self, e):
-        # make sure to remove even if auto-repeated
-        self._keys.discard(e.key())
+        if not e.isAutoRepeat():
+            self._set_keymask(self._keymask & ~_KEYBIT.get(e.key(), 0))
         super().keyReleaseEvent(e)
 
     def mousePressEvent(self, e):
@@ -190,7 +432,8 @@ class SimpleGLViewport(QOpenGLWidget):
             self._yaw   += dx * 0.2
             self._pitch += -dy * 0.2
             self._pitch = max(-89.9, min(89.9, self._pitch))
-        self.update()
+            self._basis_cache = None
+            self.update()
         super().mouseMoveEvent(e)
 
     def wheelEvent(self, e):
@@ -203,142 +446,324 @@ class SimpleGLViewport(QOpenGLWidget):
         super().wheelEvent(e)
 
     def _update_movement(self, dt: float):
-        if not self._keys:
+        f, r, u = _MOVE_DIRS[self._keymask]
+        if not (f or r or u):
             return
         # hold Shift to move faster
-        fast = (Qt.Key_Shift in self._keys)
-        spd = self._move_speed * (2.25 if fast else 1.0)
+        sprint = QApplication.keyboardModifiers() & Qt.ShiftModifier
+        spd = self._move_speed * (2.25 if sprint else 1.0)
 
+        # basis is orthonormal, so |f*fwd + r*right + u*up| == sqrt(f^2 + r^2 + u^2)
         fwd, right, up = self._basis()
-        move = (0.0, 0.0, 0.0)
-        if Qt.Key_W in self._keys: move = _add(move, fwd)
-        if Qt.Key_S in self._keys: move = _sub(move, fwd)
-        if Qt.Key_D in self._keys: move = _add(move, right)
-        if Qt.Key_A in self._keys: move = _sub(move, right)
-        if Qt.Key_E in self._keys: move = _add(move, up)      # up
-        if Qt.Key_Q in self._keys: move = _sub(move, up)      # down
-
-        if move != (0.0,0.0,0.0):
-            move = _normalize(move)
-            self._cam_pos = _add(self._cam_pos, _mul(move, spd * dt))
+        s = spd * dt / math.sqrt(f*f + r*r + u*u)
+        x, y, z = self._cam_pos
+        self._cam_pos = (x + (f*fwd[0] + r*right[0] + u*up[0]) * s,
+                         y + (f*fwd[1] + r*right[1] + u*up[1]) * s,
+                         z + (f*fwd[2] + r*right[2] + u*up[2]) * s)
+        self._dirty = True
 
     # ------------- camera math -------------
     def _basis(self):
-        # forward from yaw/pitch (degrees)
+        if self._basis_cache is not None:
+            return self._basis_cache
+        # forward from yaw/pitch (degrees); already unit length
         cp = math.radians(self._pitch)
         cy = math.radians(self._yaw)
-        fwd = (math.cos(cp)*math.sin(cy), math.sin(cp), math.cos(cp)*math.cos(cy))
-        fwd = _normalize(fwd)
-        world_up = (0.0, 1.0, 0.0)
-        right = _normalize(_cross(fwd, world_up))
-        up = _normalize(_cross(right, fwd))
-        return fwd, right, up
+        sin_p, cos_p = math.sin(cp), math.cos(cp)
+        sin_y, cos_y = math.sin(cy), math.cos(cy)
+        fwd = (cos_p*sin_y, sin_p, cos_p*cos_y)
+        # normalize(cross(fwd, world_up)); pitch is clamped so cos_p > 0
+        right = (-cos_y, 0.0, sin_y)
+        up = _cross(right, fwd)  # unit: right and fwd are orthonormal
+        self._basis_cache = (fwd, right, up)
+        return self._basis_cache
+
+    def _projection_matrix(self, w, h):
+        # gluPerspective(fov, w/h, near, far), rebuilt only when size or fov change
+        key = (w, h, self._fov)
+        if self._proj_key != key:
+            f = 1.0 / math.tan(math.radians(self._fov) / 2.0)
+            zn, zf = self._near, self._far
+            m = np.zeros((4, 4), dtype=np.float32)
+            m[0, 0] = f / (w / float(h))
+            m[1, 1] = f
+            m[2, 2] = (zf + zn) / (zn - zf)
+            m[2, 3] = -1.0
+            m[3, 2] = (2.0 * zf * zn) / (zn - zf)
+            self._proj_mat, self._proj_key = m, key
+            self._mvp_stale = True
+        return self._proj_mat
+
+    def _view_matrix(self):
+        # gluLookAt(eye, eye+fwd, up) as a column-major matrix; rebuilt only when
+        # the camera tuples have been replaced since the last frame
+        basis = self._basis()
+        if self._view_pos is self._cam_pos and self._view_basis is basis:
+            return self._view_mat
+        fwd, right, up = basis
+        ex, ey, ez = self._cam_pos
+        m = self._view_mat
+        m[0, 0], m[1, 0], m[2, 0] = right
+        m[0, 1], m[1, 1], m[2, 1] = up
+        m[0, 2], m[1, 2], m[2, 2] = -fwd[0], -fwd[1], -fwd[2]
+        m[3, 0] = -(right[0]*ex + right[1]*ey + right[2]*ez)
+        m[3, 1] = -(up[0]*ex + up[1]*ey + up[2]*ez)
+        m[3, 2] = fwd[0]*ex + fwd[1]*ey + fwd[2]*ez
+        self._view_pos, self._view_basis = self._cam_pos, basis
+        self._mvp_stale = True
+        return m
+
+    def _update_mvp(self):
+        # column-major arrays, so proj * view is view_arr @ proj_arr; recomputed (and
+        # re-serialized for the uniform uploads) only when either side was rebuilt
+        view = self._view_matrix()
+        if self._mvp_stale:
+            np.matmul(view, self._proj_mat, out=self._mvp)
+            self._mvp_bytes = self._mvp.tobytes()
+            self._view_bytes = view.tobytes()
+            self._mvp_stale = False
+            self._mvp_gen += 1
+
+    def _use_camera(self, prog, u_mvp, u_view=None):
+        # bind prog and upload the camera uniforms only if it hasn't seen this MVP yet
+        glUseProgram(prog)
+        if self._prog_gen.get(prog) != self._mvp_gen:
+            glUniformMatrix4fv(u_mvp, 1, GL_FALSE, self._mvp_bytes)
+            if u_view is not None:
+                glUniformMatrix4fv(u_view, 1, GL_FALSE, self._view_bytes)
+            self._prog_gen[prog] = self._mvp_gen
 
     # ------------- drawing -------------
-    def _draw_grid(self, half=20, step=1.0):
-        # axis colors + faint grid
-        lr, lg, lb = (0.35, 0.35, 0.40)
-        xr, xg, xb = (0.85, 0.25, 0.25)   # X red
-        zr, zg, zb = (0.25, 0.70, 0.85)   # Z cyan-ish
-
-        glLineWidth(1.0)
-        glBegin(GL_LINES)
-        for i in range(-half, half+1):
-            if i == 0:
-                glColor3f(xr,xg,xb)  # X axis
-                glVertex3f(-half*step, 0.0, 0.0); glVertex3f(half*step, 0.0, 0.0)
-                glColor3f(zr,zg,zb)  # Z axis
-                glVertex3f(0.0, 0.0, -half*step); glVertex3f(0.0, 0.0, half*step)
-            else:
-                glColor3f(lr,lg,lb)
-                # lines parallel to Z
-                glVertex3f(i*step, 0.0, -half*step); glVertex3f(i*step, 0.0, half*step)
-                # lines parallel to X
-                glVertex3f(-half*step, 0.0, i*step); glVertex3f(half*step, 0.0, i*step)
-        glEnd()
+    def _draw_grid(self):
+        # LOD: constant line count, spacing from camera height, window following the camera
+        cx, cy, cz = self._cam_pos
+        step = self._grid_step * 10.0 ** max(0, math.floor(math.log10(max(abs(cy), 1e-6) / self._grid_step)))
+        key = (self._grid_half, step, round(cx / step), round(cz / step))
+        if self._grid_vbo is None or self._grid_key != key:
+            self._build_grid(*key)
+
+        self._use_camera(self._line_prog, self._line_u_mvp)
+        glBindVertexArray(self._grid_vao)
+        glDrawArrays(GL_LINES, 0, self._grid_n)
+
+    def _build_grid(self, half, step, ox, oz):
+        # axis colors + faint grid, baked into a pos+color line VBO; lines span
+        # cells ox-half..ox+half along X and oz-half..oz+half along Z
+        grid_c = (0.35, 0.35, 0.40)
+        x_c    = (0.85, 0.25, 0.25)   # X red
+        z_c    = (0.25, 0.70, 0.85)   # Z cyan-ish
+
+        ix = np.arange(ox - half, ox + half + 1)
+        iz = np.arange(oz - half, oz + half + 1)
+        x0, x1 = ix[0] * step, ix[-1] * step
+        z0, z1 = iz[0] * step, iz[-1] * step
+        tx = (ix[ix != 0] * step).astype(np.float32)
+        tz = (iz[iz != 0] * step).astype(np.float32)
+        # lines parallel to Z, then lines parallel to X (two endpoints each)
+        along_z = np.stack([np.stack([tx, 0*tx, np.full_like(tx, z0)], -1),
+                            np.stack([tx, 0*tx, np.full_like(tx, z1)], -1)], axis=1)
+        along_x = np.stack([np.stack([np.full_like(tz, x0), 0*tz, tz], -1),
+                            np.stack([np.full_like(tz, x1), 0*tz, tz], -1)], axis=1)
+        # axes only when they fall inside the window
+        axes = []; axis_c = []
+        if iz[0] <= 0 <= iz[-1]:
+            axes += [(x0, 0.0, 0.0), (x1, 0.0, 0.0)]; axis_c += [x_c, x_c]
+        if ix[0] <= 0 <= ix[-1]:
+            axes += [(0.0, 0.0, z0), (0.0, 0.0, z1)]; axis_c += [z_c, z_c]
+        n_axes = len(axes)
+        pos = np.concatenate([along_z.reshape(-1, 3), along_x.reshape(-1, 3),
+                              np.array(axes, dtype=np.float32).reshape(-1, 3)])
+
+        data = np.empty((len(pos), 6), dtype=np.float32)
+        data[:, :3] = pos
+        data[:len(pos) - n_axes, 3:] = grid_c
+        if n_axes:
+            data[len(pos) - n_axes:, 3:] = axis_c
+
+        if self._grid_vbo is None:
+            self._grid_vbo = int(glGenBuffers(1))
+            self._grid_vao = int(glGenVertexArrays(1))
+            glBindVertexArray(self._grid_vao)
+            glBindBuffer(GL_ARRAY_BUFFER, self._grid_vbo)
+            _bind_interleaved_attribs(6 * 4)   # 3 pos + 3 color floats
+            glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, self._grid_vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._grid_n = len(data)
+        self._grid_key = (half, step, ox, oz)
 
     def _draw_mesh(self):
-        if not self._verts or not self._faces:
+        if self._mesh_dirty:
+            self._upload_mesh()
+        elif self._verts_dirty:
+            self._upload_verts()
+        if not self._n_indices:
             return
 
-        glColor3f(*self._line)
-
-        # pick flat vs smooth (smooth if we computed normals)
-        smooth = bool(self._vnorms) and (len(self._vnorms) == len(self._verts))
-        glBegin(GL_TRIANGLES)
-        if smooth:
-            for a,b,c in self._faces:
-                na = self._vnorms[a]; nb = self._vnorms[b]; nc = self._vnorms[c]
-                ax,ay,az = self._verts[a]; bx,by,bz = self._verts[b]; cx,cy,cz = self._verts[c]
-                glNormal3f(*na); glVertex3f(ax,ay,az)
-                glNormal3f(*nb); glVertex3f(bx,by,bz)
-                glNormal3f(*nc); glVertex3f(cx,cy,cz)
-        else:
-            # flat shading per face
-            for a,b,c in self._faces:
-                v0 = self._verts[a]; v1 = self._verts[b]; v2 = self._verts[c]
-                n = _normalize(_cross(_sub(v1,v0), _sub(v2,v0)))
-                glNormal3f(*n)
-                glVertex3f(*v0); glVertex3f(*v1); glVertex3f(*v2)
-        glEnd()
+        u = self._mesh_u
+        self._use_camera(self._mesh_prog, u["uMVP"], u["uView"])
+        glBindVertexArray(self._vao)
+        glDrawElements(GL_TRIANGLES, self._n_indices, GL_UNSIGNED_INT, None)
+
+    # ------------- GPU buffers -------------
+    def _pack_vertices(self):
+        # quantize positions to int16 around the bbox center (12 -> 6 bytes, padded to 8);
+        # the vertex shader undoes it with uPosScale/uPosOffset
+        mn, mx = self._verts.min(axis=0), self._verts.max(axis=0)
+        offset = (mn + mx) * 0.5
+        half = (mx - mn) * 0.5
+        half = np.where(half > 0, half, 1.0)
+        data = np.zeros(len(self._verts), dtype=_MESH_VERTEX)
+        data["pos"][:, :3] = np.round((self._verts - offset) / half * 32767.0)
+        data["nrm"] = self._vnorms
+        glUseProgram(self._mesh_prog)
+        glUniform3f(self._mesh_u["uPosScale"], *(half / 32767.0).tolist())
+        glUniform3f(self._mesh_u["uPosOffset"], *offset.tolist())
+        glUseProgram(0)
+        return data
+
+    def _upload_mesh(self):
+        # needs a current GL context (called from paintGL)
+        self._release_mesh_buffers()
+        self._mesh_dirty = self._verts_dirty = False
+        if not len(self._faces) or not len(self._verts):
+            return
+        data = self._pack_vertices()
+        idx = np.ascontiguousarray(self._faces, dtype=np.uint32)
+
+        self._vbo, self._ibo = (int(b) for b in glGenBuffers(2))
+        self._vao = int(glGenVertexArrays(1))
+        glBindVertexArray(self._vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+        stride = _MESH_VERTEX.itemsize
+        glEnableVertexAttribArray(0)
+        # unnormalized: aPos is the raw int, so the shader's half/32767 scale is the only divide
+        # (and signed-normalized conversion rules differing between GL 3.3 and 4.2 don't apply)
+        glVertexAttribPointer(0, 3, GL_SHORT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, stride,
+                              ctypes.c_void_p(_MESH_VERTEX.fields["nrm"][1]))
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._ibo)   # recorded in the VAO
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, idx.nbytes, idx, GL_STATIC_DRAW)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._n_indices = idx.size
+
+    def _upload_verts(self):
+        # refresh vertex data only; the IBO and VAO layout stay as they are
+        self._verts_dirty = False
+        if not self._vbo:
+            return
+        data = self._pack_vertices()
+        glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+        # orphan the old store so the driver needn't wait on frames still reading it
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, None, GL_DYNAMIC_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _release_mesh_buffers(self):
+        if self._vao:
+            glDeleteVertexArrays(1, [self._vao])
+        bufs = [b for b in (self._vbo, self._ibo) if b]
+        if bufs:
+            glDeleteBuffers(len(bufs), bufs)
+        self._vbo = self._ibo = self._vao = None
+        self._n_indices = 0
 
     # ------------- OBJ loading + fit -------------
     def _load_obj(self, path: str):
-        verts = []; faces = []
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                if not line or line.startswith("#"): continue
-                parts = line.strip().split()
-                if not parts: continue
-                if parts[0] == "v" and len(parts) >= 4:
-                    x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
-                    verts.append((x, y, z))
-                elif parts[0] == "f" and len(parts) >= 4:
-                    idxs = []
-                    for p in parts[1:]:
-                        # forms: "v", "v/t", "v//n", "v/t/n"
-                        v = p.split("/")[0]
-                        if not v: continue
-                        idx = int(v)
-                        if idx < 0: idx = len(verts) + idx + 1
-                        idxs.append(idx-1)  # OBJ -> 0-based
-                    # triangulate fan
-                    for i in range(1, len(idxs)-1):
-                        faces.append((idxs[0], idxs[i], idxs[i+1]))
+        # pre-triangulated arrays are cached next to the OBJ, valid while the loader
+        # version and the OBJ's mtime/size match
+        cache = path + ".cache.npz"
+        st = os.stat(path)
+        key = np.array([_OBJ_CACHE_VERSION, st.st_mtime_ns, st.st_size], dtype=np.int64)
+        if self._load_obj_cache(cache, key):
+            self._compute_bounds()
+            self._mesh_dirty = True
+            return
 
+        with open(path, "rb") as f:
+            data = f.read()
+
+        # vertices: first three tokens of every "v" line, converted to float in one call
+        coords = _OBJ_V_RE.findall(data)
+        verts = np.array(coords, dtype=bytes).astype(np.float32).reshape(-1, 3)
+
+        # faces: strip each ref down to its vertex index, then parse all indices in bulk
+        bodies = _OBJ_F_RE.findall(data)
+        refs = _OBJ_REF_TAIL_RE.sub(b"", b"\n".join(bodies))
+        # one size per "f" line, blank ones included, so sizes lines up with f_at below
+        sizes = np.fromiter((len(l.split()) for l in refs.split(b"\n")),
+                            dtype=np.int64, count=len(bodies))
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        idxs = np.array(refs.split(), dtype=bytes).astype(np.int64)
+        if len(idxs) and idxs.min() < 0:
+            # negative refs count back from the vertices read before that face
+            v_at = np.fromiter((m.start() for m in _OBJ_V_RE.finditer(data)), dtype=np.int64)
+            f_at = np.fromiter((m.start() for m in _OBJ_F_RE.finditer(data)), dtype=np.int64)
+            seen = np.repeat(np.searchsorted(v_at, f_at), sizes)
+            idxs = np.where(idxs < 0, seen + idxs + 1, idxs)
+        idxs -= 1  # OBJ -> 0-based
+        # the kernels and glDrawElements don't bounds-check; reject bad refs up front
+        if len(idxs) and (idxs.min() < 0 or idxs.max() >= len(verts)):
+            raise ValueError(f"{path}: face references a vertex outside 1..{len(verts)}")
         self._verts = verts
-        self._faces = faces
+        self._faces = _triangulate_fans(offsets, idxs.astype(np.int32))
         self._compute_bounds()
         self._compute_vertex_normals()
+        self._mesh_dirty = True
+        self._save_obj_cache(cache, key)
+
+    def _load_obj_cache(self, cache: str, key) -> bool:
+        if not os.path.exists(cache):
+            return False
+        try:
+            with np.load(cache) as z:
+                if not np.array_equal(z["k"], key):
+                    return False
+                verts, faces, vnorms = z["v"], z["f"], z["n"]
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return False   # unreadable/stale cache: fall back to parsing
+        # same range check as a fresh parse; anything off just means "reparse"
+        if (verts.ndim != 2 or verts.shape[1] != 3 or vnorms.shape != verts.shape
+                or faces.ndim != 2 or faces.shape[1] != 3 or faces.dtype.kind not in "iu"
+                or (len(faces) and (faces.min() < 0 or faces.max() >= len(verts)))):
+            return False
+        self._verts, self._faces, self._vnorms = verts, faces, vnorms
+        return True
+
+    def _save_obj_cache(self, cache: str, key):
+        tmp = cache + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(f, k=key, v=self._verts, f=self._faces, n=self._vnorms)
+            os.replace(tmp, cache)
+        except OSError:
+            pass   # read-only location: just parse again next time
 
     def _compute_bounds(self):
-        if not self._verts:
+        if not len(self._verts):
             self._bbox = None
             self._center = (0.0, 0.0, 0.0)
             return
-        xs = [v[0] for v in self._verts]
-        ys = [v[1] for v in self._verts]
-        zs = [v[2] for v in self._verts]
-        self._bbox = (min(xs), min(ys), min(zs), max(xs), max(ys), max(zs))
-        self._center = ((min(xs)+max(xs))/2.0, (min(ys)+max(ys))/2.0, (min(zs)+max(zs))/2.0)
+        mn = self._verts.min(axis=0); mx = self._verts.max(axis=0)
+        self._bbox = (*mn.tolist(), *mx.tolist())
+        self._center = tuple(((mn + mx) * 0.5).tolist())
 
     def _compute_vertex_normals(self):
-        if not self._verts or not self._faces:
-            self._vnorms = []
+        if not len(self._verts) or not len(self._faces):
+            self._vnorms = np.zeros((0, 3), dtype=np.float32)
             return
-        acc = [(0.0,0.0,0.0) for _ in self._verts]
-        for a,b,c in self._faces:
-            v0 = self._verts[a]; v1 = self._verts[b]; v2 = self._verts[c]
-            n = _normalize(_cross(_sub(v1,v0), _sub(v2,v0)))
-            acc[a] = _add(acc[a], n)
-            acc[b] = _add(acc[b], n)
-            acc[c] = _add(acc[c], n)
-        self._vnorms = [_normalize(n) for n in acc]
+        self._vnorms = _vertex_normals(self._verts, self._faces)
 
     def _frame_to_fit(self):
         if not self._bbox:
             self._cam_pos = (0.0, 0.75, 3.5)
             self._yaw, self._pitch = 35.0, -20.0
+            self._basis_cache = None
             self._dist = 3.5
             return
         minx,miny,minz, maxx,maxy,maxz = self._bbox
@@ -346,6 +771,7 @@ class SimpleGLViewport(QOpenGLWidget):
         size = max(size, 0.25)
         self._dist = 2.2 * size
         self._yaw, self._pitch = 35.0, -20.0
+        self._basis_cache = None
         # put camera back from center along -forward
         fwd, _, _ = self._basis()
         self._cam_pos = _sub(self._center, _mul(fwd, self._dist))
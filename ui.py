@@ -4,13 +4,6 @@
 
 from __future__ import annotations
 
-# ---- hotfix: make Key_Shift_L/R exist even if renderer asks for them ----
-from PySide6.QtCore import Qt
-if not hasattr(Qt, "Key_Shift_L"):
-    Qt.Key_Shift_L = Qt.Key_Shift
-if not hasattr(Qt, "Key_Shift_R"):
-    Qt.Key_Shift_R = Qt.Key_Shift
-# -------------------------------------------------------------------------
 import os
 OBJ_PATH = os.path.join(os.path.dirname(__file__), "cube.obj")  # or rename to your file
 
@@ -18,10 +11,10 @@ import ai.generator as _g
 print("Using generator at:", _g.__file__)
 
 from ai.generator import GeneratorEngine
-from renderer import SimpleGLViewport
+from renderer import SimpleGLViewport, surface_format
 import sys
 from PySide6.QtCore import Qt, QSize
-from PySide6.QtGui import QPainter, QPen, QColor, QFont
+from PySide6.QtGui import QPainter, QPen, QColor, QFont, QSurfaceFormat
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QSplitter,
     QFrame, QLabel, QLineEdit, QPushButton, QStackedWidget,
@@ -452,6 +445,8 @@ class Main(QMainWindow):
 
 # Run
 if __name__ == "__main__":
+    # core profile must be the default before QApplication exists (macOS, context sharing)
+    QSurfaceFormat.setDefaultFormat(surface_format())
     app = QApplication(sys.argv)
     win = Main()
     win.show()